@@ -6,25 +6,58 @@ import logging
 import configparser
 import re
 import traceback
-from datetime import datetime, date
+import imaplib
+import calendar
+from datetime import datetime, date, timedelta
 from PyQt5 import QtWidgets, QtGui, QtCore
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import QSystemTrayIcon
-from imap_tools import MailBox
+from imap_tools import MailBox, MailboxLoginError, AND
 from logging.handlers import RotatingFileHandler
 import importlib
+import ast
 import json
 import shutil
+import codecs
+import fnmatch
+from dataclasses import dataclass, field, fields
+
+# Optional, faster JSON libraries (stdlib json is the fallback)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+# Directory containing this script, resolved once so a chdir can't move it
+_HERE = os.path.dirname(os.path.abspath(__file__))
 
 ################################################################################
 #                          VERSION & CHANGELOG SECTION                         #
 ################################################################################
 
-VERSION = '0.6.0'
+VERSION = '0.7.0'
 CHANGELOG = r"""
 # Worms Direct Management Changelog
 
+## Version 0.7.0
+
+- Kept a single IMAP connection open between email checks instead of logging in on every poll, with a keep-alive NOOP every 25 minutes.
+- Only fetched messages with a UID above the highest processed one instead of downloading the whole folder on every check.
+- Wrote processed UIDs once per check through a persistent file descriptor instead of reopening the file for every email.
+- Deferred importing script tabs until they are first opened, so startup no longer pays for every script in `scripts`.
+- Log window now only reads lines appended since the last refresh and keeps the most recent 5000 lines.
+- Checked email on a background thread so the GUI no longer freezes while attachments download.
+- Fixed invoice dates whose day offset crosses a month boundary: they now roll into the neighbouring month rather than falling back to the 1st.
+- Skipped downloading message bodies for emails whose headers show they can't contain attachments.
+- "Process Invoices" now skips files matching the Ignore Files patterns (glob syntax, case-insensitive).
+- Refused to add a second rule for a sender email that already has one (only one rule per sender was ever applied).
+- "Process Invoices" runs in the background, so the window stays responsive while files are moved.
+
 ## Version 0.6.0
 
 - Integrated invoice-processing functionality fully into the main script.
@@ -93,6 +126,9 @@ CHANGELOG = r"""
 - Set up the application to run as a system tray application using PyQt5.
 """
 
+# Attachments are written to disk in chunks of this size
+ATTACHMENT_CHUNK_SIZE = 1 << 20
+
 ################################################################################
 #                                 MAIN WINDOW                                  #
 ################################################################################
@@ -115,20 +151,22 @@ class MainWindow(QtWidgets.QMainWindow):
         # Tab Widget
         self.tabs = QtWidgets.QTabWidget()
         
-        # Dynamically load scripts as tabs
+        # Script tabs are registered as placeholders and imported on first view
+        self.pending_tabs = {}
         self.load_scripts()
         
         # Add the "Invoices Management" tab
         from __main__ import InvoicesManagementTab
         self.tabs.addTab(InvoicesManagementTab(self.config), "Invoices Management")
+        self.tabs.currentChanged.connect(self.materialize_tab)
         
         # Add tabs to the main layout
         layout.addWidget(self.tabs)
         central_widget.setLayout(layout)
     
     def load_scripts(self):
-        """Dynamically load scripts from the 'scripts' directory as tabs."""
-        scripts_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts')
+        """Register scripts from the 'scripts' directory as lazily-loaded tabs."""
+        scripts_path = os.path.join(_HERE, 'scripts')
         if not os.path.exists(scripts_path):
             logging.error(f"Scripts directory not found at {scripts_path}")
             return
@@ -138,17 +176,72 @@ class MainWindow(QtWidgets.QMainWindow):
         for filename in os.listdir(scripts_path):
             if filename.endswith('.py') and filename != '__init__.py':
                 module_name = filename[:-3]
-                try:
-                    module = importlib.import_module(module_name)
-                    if hasattr(module, 'Tab'):
-                        tab_class = getattr(module, 'Tab')
-                        tab_instance = tab_class(self.config)
-                        self.tabs.addTab(tab_instance, tab_instance.tab_name)
-                        logging.info(f"Loaded script '{module_name}' as tab '{tab_instance.tab_name}'.")
-                    else:
-                        logging.warning(f"Module '{module_name}' does not have a 'Tab' class.")
-                except Exception as e:
-                    logging.error(f"Failed to load script '{module_name}': {traceback.format_exc()}")
+                tab_name = self.peek_tab_name(os.path.join(scripts_path, filename), module_name)
+                placeholder = QtWidgets.QWidget()
+                self.pending_tabs[placeholder] = module_name
+                self.tabs.addTab(placeholder, tab_name)
+                logging.info(f"Registered script '{module_name}' as tab '{tab_name}'.")
+    
+    def peek_tab_name(self, path, default):
+        """Read a script's `tab_name` assignment without importing it."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                tree = ast.parse(f.read(), filename=path)
+        except Exception as e:
+            logging.warning(f"Could not parse '{path}' for a tab name: {e}")
+            return default
+        
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Assign) and isinstance(node.value, ast.Constant) \
+                    and isinstance(node.value.value, str):
+                for target in node.targets:
+                    name = target.attr if isinstance(target, ast.Attribute) else getattr(target, 'id', None)
+                    if name == 'tab_name':
+                        return node.value.value
+        return default
+    
+    def materialize_tab(self, index):
+        """Import a placeholder tab's script and swap in the real widget."""
+        placeholder = self.tabs.widget(index)
+        module_name = self.pending_tabs.pop(placeholder, None)
+        if module_name is None:
+            return
+        
+        error = None
+        try:
+            module = importlib.import_module(module_name)
+            if not hasattr(module, 'Tab'):
+                logging.warning(f"Module '{module_name}' does not have a 'Tab' class.")
+                error = f"Script '{module_name}' does not have a 'Tab' class."
+            else:
+                tab_class = getattr(module, 'Tab')
+                tab_instance = tab_class(self.config)
+                tab_name = tab_instance.tab_name
+        except Exception as e:
+            logging.error(f"Failed to load script '{module_name}': {traceback.format_exc()}")
+            error = f"Failed to load script '{module_name}':\n{e}"
+        
+        # Show the failure in the tab rather than leaving it blank
+        if error is not None:
+            tab_instance = QtWidgets.QLabel(error)
+            tab_instance.setAlignment(Qt.AlignCenter)
+            tab_instance.setWordWrap(True)
+            tab_name = self.tabs.tabText(index)
+        
+        # Swapping widgets would otherwise re-trigger currentChanged
+        self.tabs.blockSignals(True)
+        self.tabs.removeTab(index)
+        self.tabs.insertTab(index, tab_instance, tab_name)
+        self.tabs.setCurrentIndex(index)
+        self.tabs.blockSignals(False)
+        placeholder.deleteLater()
+        if error is None:
+            logging.info(f"Loaded script '{module_name}' as tab '{tab_name}'.")
+    
+    def showEvent(self, event):
+        """Load the initially selected tab the first time the window is shown."""
+        super(MainWindow, self).showEvent(event)
+        self.materialize_tab(self.tabs.currentIndex())
     
     def closeEvent(self, event):
         """Override the close event to hide the window instead of closing."""
@@ -172,13 +265,19 @@ class LogWindow(QtWidgets.QWidget):
         self.setWindowTitle("Worms Direct Management Logs")
         self.setGeometry(300, 300, 600, 400)
         self.log_file = log_file
+        self._last_offset = 0
+        # Keeps a multi-byte character split across two refreshes intact
+        self._decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        # Text after the last newline, held until its line is complete
+        self._partial_line = ''
         
         # Layout
         layout = QtWidgets.QVBoxLayout()
         
-        # Text Edit for logs
-        self.log_text = QtWidgets.QTextEdit()
+        # Plain text view for logs, capped to keep layout cheap
+        self.log_text = QtWidgets.QPlainTextEdit()
         self.log_text.setReadOnly(True)
+        self.log_text.setMaximumBlockCount(5000)
         
         # Load log file
         self.refresh_logs()
@@ -192,16 +291,36 @@ class LogWindow(QtWidgets.QWidget):
         self.setLayout(layout)
     
     def refresh_logs(self):
-        """Refresh the log display."""
+        """Append any log lines written since the last refresh."""
         if os.path.exists(self.log_file):
             try:
-                with open(self.log_file, 'r') as f:
-                    self.log_text.setPlainText(f.read())
+                # The log was rotated; start over from the new file
+                if os.stat(self.log_file).st_size < self._last_offset:
+                    self._last_offset = 0
+                    self._decoder.reset()
+                    self._partial_line = ''
+                    self.log_text.clear()
+                
+                with open(self.log_file, 'rb') as f:
+                    f.seek(self._last_offset)
+                    chunk = f.read()
+                    self._last_offset = f.tell()
+                
+                text = (self._partial_line + self._decoder.decode(chunk)).replace('\r\n', '\n')
+                text, _, self._partial_line = text.rpartition('\n')
+                if text:
+                    self.log_text.appendPlainText(text)
                 logging.info("Log window refreshed.")
             except Exception as e:
+                self._last_offset = 0
+                self._decoder.reset()
+                self._partial_line = ''
                 self.log_text.setPlainText(f"Failed to refresh logs: {e}")
                 logging.error(f"Failed to refresh logs in log window: {e}")
         else:
+            self._last_offset = 0
+            self._decoder.reset()
+            self._partial_line = ''
             self.log_text.setPlainText("No logs available.")
             logging.warning("Log window refresh attempted but no log file found.")
 
@@ -235,7 +354,30 @@ class ChangelogWindow(QtWidgets.QWidget):
 #                           SYSTEM TRAY APPLICATION                            #
 ################################################################################
 
+class _FetchWorkerSignals(QtCore.QObject):
+    """Signals emitted by _FetchWorker back to the GUI thread."""
+    finished = QtCore.pyqtSignal(int)
+    error = QtCore.pyqtSignal(str)
+
+class _FetchWorker(QtCore.QRunnable):
+    """Runs one email check on a QThreadPool thread."""
+    def __init__(self, downloader):
+        super(_FetchWorker, self).__init__()
+        self.downloader = downloader
+        self.signals = _FetchWorkerSignals()
+    
+    def run(self):
+        try:
+            new_attachments = self.downloader.fetch_new_attachments()
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(new_attachments)
+
 class EmailAttachmentDownloader(QtWidgets.QSystemTrayIcon):
+    # Characters that are not allowed in Windows filenames
+    _SANITIZE_TABLE = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+    
     def __init__(self, icon, config, parent=None):
         super(EmailAttachmentDownloader, self).__init__(icon, parent)
         self.setToolTip(f"Worms Direct Management v{VERSION}")
@@ -249,6 +391,7 @@ class EmailAttachmentDownloader(QtWidgets.QSystemTrayIcon):
         self.FOLDER = self.config.get('IMAP', 'FOLDER', fallback='Invoices')
         self.download_folder = self.config.get('DOWNLOAD', 'FOLDER_PATH', fallback='D:\\Sync\\Businesses\\Worms Direct\\Invoices')
         os.makedirs(self.download_folder, exist_ok=True)
+        self.download_prefix = os.path.join(self.download_folder, '')
         
         # Exponential Backoff
         self.initial_backoff = int(self.config.get('SETTINGS', 'INITIAL_BACKOFF', fallback='60'))
@@ -266,14 +409,40 @@ class EmailAttachmentDownloader(QtWidgets.QSystemTrayIcon):
         
         # Processed UIDs Setup
         self.processed_uids_file = self.config.get('SETTINGS', 'PROCESSED_UIDS_FILE', fallback='processed_uids.txt')
-        self.processed_uids = set()
+        self.processed_uids = set()  # ints, to keep memory down over months of UIDs
         self.load_processed_uids()
+        self.max_seen_uid = max(self.processed_uids, default=0)
+        try:
+            self.uid_fd = os.open(
+                self.processed_uids_file,
+                os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0),
+                0o644
+            )
+        except OSError as e:
+            self.uid_fd = None
+            logging.error(f"Failed to open processed UIDs file for writing: {e}")
+        
+        # Persistent IMAP connection (opened lazily on the first check)
+        self.mailbox = None
+        self.mailbox_lock = QtCore.QMutex()
+        self.keep_alive_interval = int(self.config.get('SETTINGS', 'KEEP_ALIVE_INTERVAL', fallback='1500'))
+        # Socket timeout (seconds) so a silently dropped session can't block a check forever
+        self.imap_timeout = int(self.config.get('SETTINGS', 'IMAP_TIMEOUT', fallback='60'))
         
         # Timer Setup
         self.timer = QtCore.QTimer()
         self.timer.timeout.connect(self.check_emails)
         self.timer.start(self.polling_interval * 1000)
         
+        # Keep-alive Timer (iCloud drops idle connections after ~30 minutes)
+        self.keep_alive_timer = QtCore.QTimer()
+        self.keep_alive_timer.timeout.connect(self.keep_alive)
+        self.keep_alive_timer.start(self.keep_alive_interval * 1000)
+        QtWidgets.qApp.aboutToQuit.connect(self.shutdown)
+        
+        # Background email checks
+        self.check_in_progress = False
+        
         # Windows
         self.log_window = None
         self.changelog_window = None
@@ -305,7 +474,8 @@ class EmailAttachmentDownloader(QtWidgets.QSystemTrayIcon):
         handler = RotatingFileHandler(
             log_file,
             maxBytes=5 * 1024 * 1024,
-            backupCount=3
+            backupCount=3,
+            encoding='utf-8'
         )
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
         handler.setFormatter(formatter)
@@ -332,31 +502,164 @@ class EmailAttachmentDownloader(QtWidgets.QSystemTrayIcon):
         if os.path.exists(self.processed_uids_file):
             try:
                 with open(self.processed_uids_file, 'r') as f:
-                    for line in f:
-                        uid = line.strip()
-                        if uid.isdigit():
-                            self.processed_uids.add(uid)
-                    logging.info("Loaded processed UIDs.")
+                    data = f.read()
+                self.processed_uids.update(map(int, filter(str.isdigit, data.split())))
+                logging.info("Loaded processed UIDs.")
             except Exception as e:
                 logging.error(f"Failed to load processed UIDs: {e}")
         else:
             logging.info("No processed UIDs file found. Starting fresh.")
     
-    def save_processed_uid(self, uid):
-        """Save a processed email UID."""
+    def save_processed_uids(self, uids):
+        """Append a batch of processed email UIDs with a single write."""
+        if not uids:
+            return
         try:
-            with open(self.processed_uids_file, 'a') as f:
-                f.write(f"{uid}\n")
-            self.processed_uids.add(uid)
-            logging.info(f"Saved processed UID: {uid}")
+            if self.uid_fd is None:
+                raise OSError("processed UIDs file is not open")
+            os.write(self.uid_fd, "".join(f"{uid}\n" for uid in uids).encode())
+            os.fsync(self.uid_fd)
+            self.processed_uids.update(uids)
+            self.max_seen_uid = max(self.max_seen_uid, max(uids))
+            logging.info(f"Saved {len(uids)} processed UID(s): {', '.join(map(str, uids))}")
         except Exception as e:
-            logging.error(f"Failed to save processed UID {uid}: {e}")
+            logging.error(f"Failed to save processed UIDs {', '.join(map(str, uids))}: {e}")
+    
+    def close_processed_uids(self):
+        """Close the processed UIDs file descriptor."""
+        if self.uid_fd is not None:
+            os.close(self.uid_fd)
+            self.uid_fd = None
+    
+    def shutdown(self):
+        """Wait for a running check, then release the connection and files."""
+        if not QtCore.QThreadPool.globalInstance().waitForDone(self.imap_timeout * 2 * 1000):
+            # Leave the connection and UID file to the worker; the OS closes them at exit
+            logging.warning("Background work still running at shutdown; not waiting for it.")
+            return
+        self.disconnect_mailbox()
+        self.close_processed_uids()
+    
+    def connect_mailbox(self):
+        """Open the persistent IMAP connection and select the folder."""
+        mailbox = MailBox(self.IMAP_SERVER, self.IMAP_PORT, timeout=self.imap_timeout).login(
+            self.EMAIL_ACCOUNT, self.PASSWORD)
+        try:
+            mailbox.folder.set(self.FOLDER)
+        except Exception:
+            # Don't leak the logged-in session; the next check reconnects from scratch
+            try:
+                mailbox.logout()
+            except Exception:
+                pass
+            raise
+        logging.info(f"Connected to folder: {self.FOLDER}")
+        self.mailbox = mailbox
+        return mailbox
+    
+    def get_mailbox(self):
+        """Return the persistent IMAP connection, reconnecting if it was dropped."""
+        if self.mailbox is None:
+            return self.connect_mailbox()
+        return self.mailbox
+    
+    def disconnect_mailbox(self):
+        """Best-effort logout; the next check will reconnect."""
+        if self.mailbox is None:
+            return
+        try:
+            self.mailbox.logout()
+            logging.info("Logged out of mailbox.")
+        except Exception as e:
+            logging.warning(f"Error while logging out of mailbox: {e}")
+        self.mailbox = None
+    
+    def keep_alive(self):
+        """Send a NOOP so the server doesn't drop the idle connection."""
+        # A check in progress keeps the connection busy anyway
+        if not self.mailbox_lock.tryLock():
+            return
+        try:
+            if self.mailbox is not None:
+                self.mailbox.client.noop()
+                logging.info("Sent IMAP keep-alive.")
+        except Exception as e:
+            logging.warning(f"IMAP keep-alive failed, dropping connection: {e}")
+            self.disconnect_mailbox()
+        finally:
+            self.mailbox_lock.unlock()
+    
+    def write_attachment(self, filename, payload):
+        """
+        Write the attachment in 1 MiB chunks with sequential-access hints to a
+        '~<filename>.part' file, then give it its final name in the download
+        folder. The temporary name doesn't match email_pattern, so
+        process_files never picks up a half-written attachment. If the final
+        name is already taken, a timestamp is appended. Returns the filename
+        actually used.
+        """
+        tmp_path = self.download_prefix + f"~{filename}.part"
+        flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+        flags |= getattr(os, 'O_BINARY', 0) | getattr(os, 'O_SEQUENTIAL', 0)
+        fd = os.open(tmp_path, flags, 0o644)
+        try:
+            try:
+                view = memoryview(payload)
+                chunk_size = ATTACHMENT_CHUNK_SIZE
+                for i in range(0, len(view), chunk_size):
+                    os.write(fd, view[i:i + chunk_size])
+                # Invoices aren't read back, so don't keep them in the page cache
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+            
+            try:
+                self.publish_attachment(tmp_path, self.download_prefix + filename)
+            except FileExistsError:
+                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+                name, ext = os.path.splitext(filename)
+                filename = f"{name}_{timestamp}{ext}"
+                self.publish_attachment(tmp_path, self.download_prefix + filename)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        return filename
+    
+    @staticmethod
+    def publish_attachment(tmp_path, final_path):
+        """Move a finished download to final_path without overwriting an existing file."""
+        try:
+            os.link(tmp_path, final_path)
+        except FileExistsError:
+            raise
+        except OSError:
+            # No hard links on this filesystem; rename refuses an existing target on Windows
+            os.rename(tmp_path, final_path)
+            return
+        os.unlink(tmp_path)
+    
+    @staticmethod
+    def may_have_attachments(msg):
+        """
+        Guess from a headers-only message whether it can carry attachments.
+        imap_tools counts any single part with a filename as an attachment,
+        so only multipart/alternative and plain text/HTML bodies that carry
+        no name= parameter and no Content-Disposition are ruled out.
+        """
+        content_type = msg.headers.get('content-type', ('text/plain',))[0].strip().lower()
+        if content_type.startswith('multipart/alternative'):
+            return False
+        if content_type.startswith(('text/plain', 'text/html')):
+            return 'name=' in content_type or 'content-disposition' in msg.headers
+        return True
     
     def sanitize_filename(self, filename):
         """Make filename safe for Windows."""
-        invalid_chars = r'[<>:"/\\|?*]'
-        sanitized = re.sub(invalid_chars, '_', filename).strip()
-        return sanitized
+        return filename.translate(self._SANITIZE_TABLE).strip()
     
     def create_tray_menu(self):
         """System tray context menu."""
@@ -406,100 +709,158 @@ class EmailAttachmentDownloader(QtWidgets.QSystemTrayIcon):
                 self.main_window.activateWindow()
     
     def check_emails(self):
-        """Fetch new emails, download attachments."""
+        """Start a background check for new emails."""
         if self.monitoring_paused:
             logging.info("Monitoring is paused. Skipping email check.")
             return
+        if self.check_in_progress:
+            logging.info("An email check is already running. Skipping.")
+            return
         
+        self.check_in_progress = True
+        worker = _FetchWorker(self)
+        worker.signals.finished.connect(self.on_check_finished)
+        worker.signals.error.connect(self.on_check_failed)
+        QtCore.QThreadPool.globalInstance().start(worker)
+    
+    def fetch_new_attachments(self):
+        """Fetch new emails and download attachments. Runs on a worker thread."""
         logging.info("Checking for new emails...")
+        self.mailbox_lock.lock()
+        try:
+            reused = self.mailbox is not None
+            try:
+                return self.fetch_from_mailbox()
+            except (imaplib.IMAP4.abort, OSError) as e:
+                if not reused:
+                    raise
+                # The pooled connection went stale between polls (sleep, NAT
+                # drop, server timeout); reconnect once before reporting failure
+                logging.warning(f"Reused IMAP connection failed ({e}). Reconnecting and retrying.")
+                return self.fetch_from_mailbox()
+        finally:
+            self.mailbox_lock.unlock()
+    
+    def fetch_from_mailbox(self):
+        """One pass over new messages on the (possibly reopened) connection. Caller holds mailbox_lock."""
+        new_uids = []
+        candidate_uids = []
+        handled_uids = set()
         try:
-            with MailBox(self.IMAP_SERVER, self.IMAP_PORT).login(self.EMAIL_ACCOUNT, self.PASSWORD) as mailbox:
-                mailbox.folder.set(self.FOLDER)
-                logging.info(f"Connected to folder: {self.FOLDER}")
+            mailbox = self.get_mailbox()
+            
+            # Let the server filter out everything we've already processed
+            criteria = AND(uid=f"{self.max_seen_uid + 1}:*")
+            
+            # Headers first, so bodies are only downloaded for possible attachments
+            for msg in mailbox.fetch(criteria, mark_seen=False, bulk=True, headers_only=True):
+                uid = int(msg.uid)
+                if uid in self.processed_uids:
+                    continue
+                if self.may_have_attachments(msg):
+                    candidate_uids.append(msg.uid)
+                else:
+                    logging.info(f"No attachments in UID {uid}. Skipping.")
+                    new_uids.append(uid)
+            
+            emails = []
+            if candidate_uids:
+                emails = mailbox.fetch(AND(uid=candidate_uids), mark_seen=False, bulk=True, headers_only=False)
+            new_attachments = 0
+            date_str = datetime.now().strftime("%Y%m%d")
+            
+            for msg in emails:
+                uid = int(msg.uid)
+                handled_uids.add(uid)
+                if uid in self.processed_uids:
+                    continue
                 
-                emails = mailbox.fetch()  # both read/unread
-                new_attachments = 0
+                if not msg.attachments:
+                    logging.info(f"No attachments in UID {uid}. Skipping.")
+                    new_uids.append(uid)
+                    continue
                 
-                for msg in emails:
-                    uid = str(msg.uid)
-                    if uid in self.processed_uids:
-                        continue
-                    
-                    if not msg.attachments:
-                        logging.info(f"No attachments in UID {uid}. Skipping.")
-                        self.save_processed_uid(uid)
+                subject = msg.subject if msg.subject else "No_Subject"
+                logging.info(f"Processing email UID: {uid}, Subject: {subject}")
+                
+                sender_email = msg.from_
+                if isinstance(sender_email, tuple):
+                    sender_email = sender_email[1]
+                
+                # Everything but the attachment's own name is shared by the whole message
+                name_prefix = f"{sender_email.strip()}_{subject.strip()}_{date_str}_{uid}_"
+                
+                for att in msg.attachments:
+                    original_filename = (att.filename or "").strip()
+                    if not original_filename:
+                        logging.warning("Attachment with no filename. Skipping.")
                         continue
                     
-                    subject = msg.subject if msg.subject else "No_Subject"
-                    logging.info(f"Processing email UID: {uid}, Subject: {subject}")
+                    # Sanitize the assembled name in a single pass
+                    new_filename = self.sanitize_filename(name_prefix + original_filename)
                     
-                    for att in msg.attachments:
-                        original_filename = self.sanitize_filename(att.filename or "")
-                        if not original_filename:
-                            logging.warning("Attachment with no filename. Skipping.")
-                            continue
-                        
-                        sender_email = msg.from_
-                        if isinstance(sender_email, tuple):
-                            sender_email = sender_email[1]
-                        sender_email = self.sanitize_filename(sender_email)
-                        
-                        invoice_name = self.sanitize_filename(subject)
-                        
-                        date_str = datetime.now().strftime("%Y%m%d")
-                        unique_id = uid
-                        
-                        new_filename = f"{sender_email}_{invoice_name}_{date_str}_{unique_id}_{original_filename}"
-                        filepath = os.path.join(self.download_folder, new_filename)
-                        
-                        if os.path.exists(filepath):
-                            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                            name, ext = os.path.splitext(new_filename)
-                            new_filename = f"{name}_{timestamp}{ext}"
-                            filepath = os.path.join(self.download_folder, new_filename)
-                        
-                        # Save
-                        try:
-                            with open(filepath, "wb") as f:
-                                f.write(att.payload)
-                            logging.info(f"Downloaded: {new_filename}")
-                            new_attachments += 1
-                        except Exception as e:
-                            logging.error(f"Failed saving {new_filename}: {e}")
-                    
-                    self.save_processed_uid(uid)
+                    # Save
+                    try:
+                        new_filename = self.write_attachment(new_filename, att.payload)
+                        logging.info(f"Downloaded: {new_filename}")
+                        new_attachments += 1
+                    except Exception as e:
+                        logging.error(f"Failed saving {new_filename}: {e}")
                 
-                if new_attachments > 0:
-                    self.showMessage(
-                        "Worms Direct Management",
-                        f"Downloaded {new_attachments} new attachment(s).",
-                        QtWidgets.QSystemTrayIcon.Information,
-                        5000
-                    )
-                    logging.info(f"Downloaded {new_attachments} new attachment(s).")
-                    # Reset backoff
-                    self.failure_count = 0
-                    self.current_backoff = self.initial_backoff
-                else:
-                    logging.info("No new attachments found.")
+                new_uids.append(uid)
+            
+            handled_uids.update(map(int, candidate_uids))
+            return new_attachments
         
-        except Exception as e:
-            logging.error(f"An error occurred while checking emails: {e}")
+        except (MailboxLoginError, imaplib.IMAP4.abort, OSError):
+            # The connection is unusable; drop it so the next check reconnects
+            self.disconnect_mailbox()
+            raise
+        finally:
+            # If the check stopped early, don't record anything at or past the
+            # first candidate it didn't get to, or max_seen_uid would skip it
+            unhandled = [int(uid) for uid in candidate_uids if int(uid) not in handled_uids]
+            if unhandled:
+                first_unhandled = min(unhandled)
+                new_uids = [uid for uid in new_uids if uid < first_unhandled]
+            self.save_processed_uids(new_uids)
+    
+    def on_check_finished(self, new_attachments):
+        """Report a successful check (main thread)."""
+        self.check_in_progress = False
+        if new_attachments > 0:
             self.showMessage(
                 "Worms Direct Management",
-                f"Error: {e}",
-                QtWidgets.QSystemTrayIcon.Critical,
+                f"Downloaded {new_attachments} new attachment(s).",
+                QtWidgets.QSystemTrayIcon.Information,
                 5000
             )
-            # Exponential backoff
-            self.failure_count += 1
-            self.current_backoff = min(
-                self.initial_backoff * (self.backoff_factor ** self.failure_count),
-                self.max_backoff
-            )
-            logging.info(f"Applying backoff: {self.current_backoff} seconds")
-            self.timer.stop()
-            self.timer.start(self.current_backoff * 1000)
+            logging.info(f"Downloaded {new_attachments} new attachment(s).")
+            # Reset backoff
+            self.failure_count = 0
+            self.current_backoff = self.initial_backoff
+        else:
+            logging.info("No new attachments found.")
+    
+    def on_check_failed(self, e):
+        """Notify and apply exponential backoff after a failed check (main thread)."""
+        self.check_in_progress = False
+        logging.error(f"An error occurred while checking emails: {e}")
+        self.showMessage(
+            "Worms Direct Management",
+            f"Error: {e}",
+            QtWidgets.QSystemTrayIcon.Critical,
+            5000
+        )
+        # Exponential backoff
+        self.failure_count += 1
+        self.current_backoff = min(
+            self.initial_backoff * (self.backoff_factor ** self.failure_count),
+            self.max_backoff
+        )
+        logging.info(f"Applying backoff: {self.current_backoff} seconds")
+        self.timer.stop()
+        self.timer.start(self.current_backoff * 1000)
     
     def show_log_window(self):
         """Display logs."""
@@ -555,31 +916,68 @@ class EmailAttachmentDownloader(QtWidgets.QSystemTrayIcon):
 #                               CONFIG LOADER                                  #
 ################################################################################
 
+_ENV_VAR_RE = re.compile(r'\$\{(\w+)\}')
+
+class EnvInterpolation(configparser.BasicInterpolation):
+    """Strip inline '#' comments and expand ${VAR} environment variables on read."""
+    def before_get(self, parser, section, option, value, defaults):
+        value = value.partition('#')[0].strip()
+        value = super(EnvInterpolation, self).before_get(parser, section, option, value, defaults)
+        # Only ${VAR} tokens: os.path.expandvars would also rewrite $$ and %VAR% on Windows
+        expanded = _ENV_VAR_RE.sub(lambda m: os.environ.get(m.group(1), m.group(0)), value)
+        if _ENV_VAR_RE.search(expanded):
+            logging.warning(f"Environment variable not set for {section}.{option}: {expanded}")
+        return expanded
+
+# Parsed config, reused until config.ini changes on disk
+_config_cache = {'key': None, 'val': None}
+
 def load_config(config_file=r'D:\Sync\Businesses\Worms Direct\Scripts\Downloading Attachments\config.ini'):
-    config = configparser.ConfigParser()
-    if not os.path.exists(config_file):
+    try:
+        st = os.stat(config_file)
+    except FileNotFoundError:
         print(f"Configuration file {config_file} not found.")
         logging.critical(f"Configuration file {config_file} not found.")
         sys.exit(1)
+    key = (config_file, st.st_mtime_ns, st.st_size)
+    if _config_cache['key'] == key:
+        return _config_cache['val']
+    
+    config = configparser.ConfigParser(interpolation=EnvInterpolation())
     config.read(config_file)
     
-    for section in config.sections():
-        for key in config[section]:
-            value = config[section][key]
-            if '#' in value:
-                value = value.split('#', 1)[0].strip()
-                config[section][key] = value
-            
-            match = re.match(r'\$\{(.+)\}', value)
-            if match:
-                var_name = match.group(1)
-                env_value = os.getenv(var_name)
-                if env_value:
-                    config[section][key] = env_value
-                else:
-                    logging.warning(f"Environment variable {var_name} not set for {section}.{key}.")
+    _config_cache['key'] = key
+    _config_cache['val'] = config
     return config
 
+################################################################################
+#                                 JSON HELPERS                                 #
+################################################################################
+
+def json_loads(buf):
+    """Parse UTF-8 JSON bytes with the fastest available library."""
+    if orjson:
+        return orjson.loads(buf)
+    if ujson:
+        return ujson.loads(buf)
+    return json.loads(buf.decode('utf-8'))
+
+def json_dumps(data, pretty=False):
+    """
+    Serialize data to UTF-8 JSON bytes with the fastest available library.
+    Output is compact unless pretty is set, which indents by 2 spaces.
+    """
+    try:
+        if orjson:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+        if ujson:
+            return ujson.dumps(data, indent=2 if pretty else 0).encode('utf-8')
+    except (TypeError, OverflowError) as e:
+        logging.warning(f"Fast JSON serializer failed, falling back to json: {e}")
+    if pretty:
+        return json.dumps(data, indent=2).encode('utf-8')
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
 ################################################################################
 #                              INVOICE PROCESSING                              #
 ################################################################################
@@ -588,12 +986,15 @@ def load_config(config_file=r'D:\Sync\Businesses\Worms Direct\Scripts\Downloadin
 base_dir = r'D:\Sync\Businesses\Worms Direct\Invoices'
 
 # Pattern to extract email from the filename:
-email_pattern = r'^([a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)_'
+email_pattern = re.compile(r'^([a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)_')
 
 # We'll dynamically load rename rules from invoices_config.json
 companies = {}
 
-def load_companies_from_json():
+# Parsed rename rules, reused until invoices_config.json changes on disk
+_companies_cache = {'key': None, 'val': None}
+
+def load_companies_from_json(report=print):
     """
     Read invoices_config.json (list of dicts) and build a dictionary.
     Each entry:
@@ -605,129 +1006,331 @@ def load_companies_from_json():
         "day_offset": 0
       }
     We'll produce a dict keyed by sender_email -> rename rules.
+    The result is cached until the file's mtime or size changes.
     """
-    script_dir = os.path.dirname(__file__)
-    config_path = os.path.join(script_dir, 'invoices_config.json')
-    if not os.path.exists(config_path):
-        print("No invoices_config.json found. Using empty dictionary.")
+    config_path = os.path.join(_HERE, 'invoices_config.json')
+    try:
+        st = os.stat(config_path)
+    except FileNotFoundError:
+        report("No invoices_config.json found. Using empty dictionary.")
         return {}
+    key = (config_path, st.st_mtime_ns, st.st_size)
+    if _companies_cache['key'] == key:
+        return _companies_cache['val']
+    
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(config_path, 'rb') as f:
+            buf = f.read()
+        data = json_loads(buf)
     except Exception as e:
-        print(f"Failed to load invoices_config.json: {e}")
+        report(f"Failed to load invoices_config.json: {e}")
         return {}
     
     result = {}
     for item in data:
-        sender = item.get('sender_email', '').lower()
-        folder_name = item.get('folder_name') or ''
-        file_name = item.get('file_name') or 'NoName'
-        month_offset = item.get('month_offset', 0)
-        day_offset = item.get('day_offset', 0)
+        # Malformed entries are kept in the file for the user to fix, but skipped here
+        try:
+            rule = SenderRule.from_dict(item)
+        except (AttributeError, TypeError, ValueError) as e:
+            report(f"Skipping malformed entry in invoices_config.json: {item!r} ({e})")
+            continue
+        sender = rule.sender_email.lower()
+        folder_name = rule.folder_name
+        file_name = rule.file_name or 'NoName'
         
         use_sub = bool(folder_name)
         
         result[sender] = {
             'name': file_name,
             'folder_name': folder_name,
-            'month_offset': month_offset,
-            'day_offset': day_offset,
+            'month_offset': rule.month_offset,
+            'day_offset': rule.day_offset,
             'use_subfolder': use_sub,
             'numbered_files': True
         }
+    
+    _companies_cache['key'] = key
+    _companies_cache['val'] = result
     return result
 
 def get_target_date(month_offset, day_offset=0):
     """
     Start from today's date, offset by month_offset and day_offset.
-    If the resulting day is out of range, fallback to the 1st of that month.
+    The day is clamped to the length of the target month before day_offset
+    is applied, so a day offset past the end (or start) of the month rolls
+    over into the neighbouring month.
     """
     today = date.today()
-    year = today.year
-    month = today.month + month_offset
-    day_ = today.day + day_offset
-    
-    while month > 12:
-        month -= 12
-        year += 1
-    while month < 1:
-        month += 12
-        year -= 1
+    y_delta, m_idx = divmod(today.month - 1 + month_offset, 12)
+    year = today.year + y_delta
+    month = m_idx + 1
+    day_ = min(today.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day_) + timedelta(days=day_offset)
+
+def get_target_folder(rules):
+    """
+    Build base_dir/<year>/<month>[/<folder_name>] for a sender's rename rules.
+    """
+    target_date = get_target_date(rules['month_offset'], rules['day_offset'])
+    month_str = target_date.strftime('%B')
+    year_str = str(target_date.year)
     
-    try:
-        return date(year, month, day_)
-    except ValueError:
-        return date(year, month, 1)
+    folder_name = rules['folder_name']
+    if rules['use_subfolder'] and folder_name:
+        return os.path.join(base_dir, year_str, month_str, folder_name)
+    return os.path.join(base_dir, year_str, month_str)
 
-def process_files():
+def process_files(is_ignored=None, report=print):
     """
     Reload rename rules from JSON, then rename and move any matching files in base_dir.
+    If given, is_ignored(filename) -> bool skips files from the ignore list.
+    Status lines are passed to report (print by default).
     """
     global companies
-    companies = load_companies_from_json()
+    companies = load_companies_from_json(report)
+    company_patterns = {}
+    folder_maxnum_cache = {}
+    # The target folder only depends on the sender's rules, so resolve it once per sender
+    target_folders = {}
     
-    for filename in os.listdir(base_dir):
-        file_path = os.path.join(base_dir, filename)
-        if not os.path.isfile(file_path):
-            print(f"Skipping non-file: {filename}")
+    # Collect the entries first, since files are moved out of base_dir below
+    with os.scandir(base_dir) as it:
+        entries = list(it)
+    
+    for entry in entries:
+        filename = entry.name
+        file_path = entry.path
+        if not entry.is_file(follow_symlinks=False):
+            report(f"Skipping non-file: {filename}")
+            continue
+        
+        if is_ignored and is_ignored(filename):
+            report(f"Ignored file: {filename}")
             continue
         
-        match = re.match(email_pattern, filename)
+        match = email_pattern.match(filename)
         if not match:
-            print(f"Email address not found in filename: {filename}")
+            report(f"Email address not found in filename: {filename}")
             continue
         
         email_address = match.group(1).lower()
         if email_address not in companies:
-            print(f"Email address not recognized: {email_address}")
+            report(f"Email address not recognized: {email_address}")
             continue
         
         rules = companies[email_address]
         company_name = rules['name']
-        folder_name = rules['folder_name']
-        month_offset = rules['month_offset']
-        day_offset = rules['day_offset']
-        use_subfolder = rules['use_subfolder']
         numbered_files = rules['numbered_files']
         
-        target_date = get_target_date(month_offset, day_offset)
-        month_str = target_date.strftime('%B')
-        year_str = str(target_date.year)
-        
-        if use_subfolder and folder_name:
-            target_folder = os.path.join(base_dir, year_str, month_str, folder_name)
-        else:
-            target_folder = os.path.join(base_dir, year_str, month_str)
-        
-        os.makedirs(target_folder, exist_ok=True)
+        target_folder = target_folders.get(email_address)
+        if target_folder is None:
+            target_folder = get_target_folder(rules)
+            os.makedirs(target_folder, exist_ok=True)
+            target_folders[email_address] = target_folder
         
         ext = os.path.splitext(filename)[1]
+        cache_key = (target_folder, company_name)
         if numbered_files:
-            existing_files = os.listdir(target_folder)
-            pattern = re.compile(r'^{}-(\d+)\b'.format(re.escape(company_name)))
-            numbers = []
-            for f in existing_files:
-                m = pattern.match(f)
-                if m:
-                    numbers.append(int(m.group(1)))
-            next_number = max(numbers, default=0) + 1
+            # Scan each folder once per run, then keep counting in memory
+            if cache_key not in folder_maxnum_cache:
+                pattern = company_patterns.get(company_name)
+                if pattern is None:
+                    pattern = re.compile(r'^{}-(\d+)\b'.format(re.escape(company_name)))
+                    company_patterns[company_name] = pattern
+                prefix = company_name + '-'
+                numbers = []
+                with os.scandir(target_folder) as it:
+                    for existing in it:
+                        if not existing.name.startswith(prefix):
+                            continue
+                        m = pattern.match(existing.name)
+                        if m:
+                            numbers.append(int(m.group(1)))
+                folder_maxnum_cache[cache_key] = max(numbers, default=0)
+            next_number = folder_maxnum_cache[cache_key] + 1
             new_filename = f"{company_name}-{next_number}{ext}"
         else:
             new_filename = f"{company_name}{ext}"
         
         new_file_path = os.path.join(target_folder, new_filename)
         if os.path.exists(new_file_path):
-            print(f"File exists (not overwritten): {new_file_path}")
+            report(f"File exists (not overwritten): {new_file_path}")
             continue
         
-        shutil.move(file_path, new_file_path)
-        print(f"Moved file to: {new_file_path}")
+        # A plain rename when both paths are on the same drive
+        try:
+            os.replace(file_path, new_file_path)
+        except OSError:
+            shutil.move(file_path, new_file_path)
+        if numbered_files:
+            folder_maxnum_cache[cache_key] = next_number
+        report(f"Moved file to: {new_file_path}")
+
+################################################################################
+#                             CONFIG TABLE MODELS                              #
+################################################################################
+
+# str() of every offset the dialog allows, shared across rows and repaints
+_MONTH_STRS = {i: str(i) for i in range(-12, 13)}
+_DAY_STRS = {i: str(i) for i in range(-31, 32)}
+
+def _restore_positions(rows, kept):
+    """Return rows with each (index, item) in kept put back at its original index."""
+    rows = list(rows)
+    for index, item in kept:
+        rows.insert(index, item)
+    return rows
+
+@dataclass(slots=True)
+class SenderRule:
+    """One invoices_config.json entry, validated once at load."""
+    sender_email: str = ""
+    folder_name: str = ""
+    file_name: str = ""
+    month_offset: int = 0
+    day_offset: int = 0
+    # Keys this version doesn't know about, written back untouched on save
+    extra: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, row):
+        """Build a rule from a JSON dict. Raises ValueError/TypeError if malformed."""
+        known = {f.name for f in fields(cls)} - {"extra"}
+        return cls(
+            sender_email=str(row.get("sender_email") or ""),
+            folder_name=str(row.get("folder_name") or ""),
+            file_name=str(row.get("file_name") or ""),
+            month_offset=int(row.get("month_offset") or 0),
+            day_offset=int(row.get("day_offset") or 0),
+            extra={k: v for k, v in row.items() if k not in known},
+        )
+
+    def to_dict(self):
+        """The JSON dict for this rule: known keys first, then any unknown keys it was loaded with."""
+        row = {
+            "sender_email": self.sender_email,
+            "folder_name": self.folder_name,
+            "file_name": self.file_name,
+            "month_offset": self.month_offset,
+            "day_offset": self.day_offset,
+        }
+        row.update(self.extra)
+        return row
+
+class SenderConfigModel(QtCore.QAbstractTableModel):
+    """Table model over the sender rules (a list of SenderRule)."""
+    HEADERS = ["Sender Email", "Folder Name", "File Name", "Month Offset", "Day Offset"]
+    KEYS = ["sender_email", "folder_name", "file_name", "month_offset", "day_offset"]
+
+    def __init__(self, rows, parent=None):
+        super(SenderConfigModel, self).__init__(parent)
+        self._rows = rows
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        rule = self._rows[index.row()]
+        col = index.column()
+        if col == 3:
+            return _MONTH_STRS.get(rule.month_offset) or str(rule.month_offset)
+        if col == 4:
+            return _DAY_STRS.get(rule.day_offset) or str(rule.day_offset)
+        return getattr(rule, self.KEYS[col])
+
+    def append_row(self, row_data):
+        row = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self._rows.append(row_data)
+        self.endInsertRows()
+
+    def update_row(self, row, row_data):
+        self._rows[row] = row_data
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+
+    def remove_row(self, row):
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self._rows[row]
+        self.endRemoveRows()
+
+class IgnoreListModel(QtCore.QAbstractTableModel):
+    """Single-column table model over the invoices_ignore.json patterns."""
+    HEADERS = ["Filename or Pattern"]
+
+    def __init__(self, rows, parent=None):
+        super(IgnoreListModel, self).__init__(parent)
+        self._rows = rows
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        return self._rows[index.row()]
+
+    def append_row(self, pattern):
+        row = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self._rows.append(pattern)
+        self.endInsertRows()
+
+    def update_row(self, row, pattern):
+        self._rows[row] = pattern
+        self.dataChanged.emit(self.index(row, 0), self.index(row, 0))
+
+    def remove_row(self, row):
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self._rows[row]
+        self.endRemoveRows()
 
 ################################################################################
 #                   INVOICES MANAGEMENT TAB (GUI FOR JSON FILES)               #
 ################################################################################
 
+# Parsed JSON files keyed by path -> (st_mtime_ns, data). The data is shared
+# with InvoicesManagementTab, its only user, rather than copied per load.
+_JSON_CACHE = {}
+
+class _ProcessWorkerSignals(QtCore.QObject):
+    """Signals emitted by _ProcessWorker back to the GUI thread."""
+    message = QtCore.pyqtSignal(str)
+    finished = QtCore.pyqtSignal()
+
+class _ProcessWorker(QtCore.QRunnable):
+    """Runs process_files() on a QThreadPool thread, forwarding its report lines."""
+    def __init__(self, process_files, is_ignored):
+        super(_ProcessWorker, self).__init__()
+        self.process_files = process_files
+        self.is_ignored = is_ignored
+        self.signals = _ProcessWorkerSignals()
+
+    def run(self):
+        report = self.signals.message.emit
+        try:
+            self.process_files(is_ignored=self.is_ignored, report=report)
+        except Exception as e:
+            report(f"Error while processing files: {e}")
+        self.signals.finished.emit()
+
 class InvoicesManagementTab(QtWidgets.QWidget):
     """
     A tab for editing invoices_config.json, ignoring patterns, etc.
@@ -735,27 +1338,64 @@ class InvoicesManagementTab(QtWidgets.QWidget):
     """
     def __init__(self, config, parent=None):
         super(InvoicesManagementTab, self).__init__(parent)
+        # Build the whole UI with updates off so only one layout pass runs
+        self.setUpdatesEnabled(False)
         self.config = config
         self.tab_name = "Invoices Management"
+        # Resolved once here rather than importing from __main__ on every click
+        self._process_files = process_files
 
         # JSON file paths
-        self.invoices_config_path = os.path.join(os.path.dirname(__file__), 'invoices_config.json')
-        self.invoices_ignore_path = os.path.join(os.path.dirname(__file__), 'invoices_ignore.json')
-        self.processed_hashes_path = os.path.join(os.path.dirname(__file__), 'processed_hashes.json')
+        self.invoices_config_path = os.path.join(_HERE, 'invoices_config.json')
+        self.invoices_ignore_path = os.path.join(_HERE, 'invoices_ignore.json')
+        self.processed_hashes_path = os.path.join(_HERE, 'processed_hashes.json')
 
         # Load or create data
-        self.invoices_config_data = self.load_json(self.invoices_config_path)
-        if not isinstance(self.invoices_config_data, list):
-            self.invoices_config_data = []
+        raw_config = self.load_json(self.invoices_config_path)
+        if not isinstance(raw_config, list):
+            raw_config = []
+        self.invoices_config_data = []
+        # Entries that don't parse stay out of the table but are saved back
+        # unchanged, as (original index, row)
+        self._malformed_sender_rows = []
+        for row in raw_config:
+            try:
+                self.invoices_config_data.append(SenderRule.from_dict(row))
+            except (AttributeError, TypeError, ValueError) as e:
+                logging.error(f"Skipping malformed entry in {self.invoices_config_path}: {row!r} ({e})")
+                self._malformed_sender_rows.append(
+                    (len(self.invoices_config_data) + len(self._malformed_sender_rows), row))
+        self._rebuild_sender_index()
         
-        self.ignore_files_data = self.load_json(self.invoices_ignore_path)
-        if not isinstance(self.ignore_files_data, list):
-            self.ignore_files_data = []
+        raw_ignore = self.load_json(self.invoices_ignore_path)
+        if not isinstance(raw_ignore, list):
+            raw_ignore = []
+        # Drop duplicate patterns (keeping file order) and index for O(1) membership.
+        # Non-string entries stay out of the table but are saved back in place.
+        self.ignore_files_data = []
+        self._malformed_ignore_items = []
+        self._ignore_set = set()
+        for item in raw_ignore:
+            if not isinstance(item, str):
+                logging.error(f"Skipping malformed entry in {self.invoices_ignore_path}: {item!r}")
+                self._malformed_ignore_items.append(
+                    (len(self.ignore_files_data) + len(self._malformed_ignore_items), item))
+            elif item not in self._ignore_set:
+                self._ignore_set.add(item)
+                self.ignore_files_data.append(item)
+        self._rebuild_ignore_re()
         
         self.processed_hashes_data = self.load_json(self.processed_hashes_path)
         if not isinstance(self.processed_hashes_data, dict):
             self.processed_hashes_data = {}
 
+        # Saves are coalesced so a burst of edits writes each file once
+        self._pending_saves = {}
+        self._save_timer = QtCore.QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.timeout.connect(self._flush_pending)
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self._flush_pending)
+
         # Layout
         main_layout = QtWidgets.QVBoxLayout()
 
@@ -775,18 +1415,14 @@ class InvoicesManagementTab(QtWidgets.QWidget):
         sender_group = QtWidgets.QGroupBox("Sender Email Configurations")
         sender_layout = QtWidgets.QVBoxLayout()
 
-        self.sender_table = QtWidgets.QTableWidget()
-        self.sender_table.setColumnCount(5)
-        self.sender_table.setHorizontalHeaderLabels(
-            ["Sender Email", "Folder Name", "File Name", "Month Offset", "Day Offset"]
-        )
+        self.sender_table = QtWidgets.QTableView()
+        self.sender_model = SenderConfigModel(self.invoices_config_data, self)
+        self.sender_table.setModel(self.sender_model)
         self.sender_table.horizontalHeader().setStretchLastSection(True)
         self.sender_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.sender_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         sender_layout.addWidget(self.sender_table)
 
-        self.populate_sender_table()
-
         btn_layout = QtWidgets.QHBoxLayout()
         self.add_sender_btn = QtWidgets.QPushButton("Add")
         self.edit_sender_btn = QtWidgets.QPushButton("Edit")
@@ -806,16 +1442,14 @@ class InvoicesManagementTab(QtWidgets.QWidget):
         ignore_group = QtWidgets.QGroupBox("Ignore Files")
         ignore_layout = QtWidgets.QVBoxLayout()
 
-        self.ignore_table = QtWidgets.QTableWidget()
-        self.ignore_table.setColumnCount(1)
-        self.ignore_table.setHorizontalHeaderLabels(["Filename or Pattern"])
+        self.ignore_table = QtWidgets.QTableView()
+        self.ignore_model = IgnoreListModel(self.ignore_files_data, self)
+        self.ignore_table.setModel(self.ignore_model)
         self.ignore_table.horizontalHeader().setStretchLastSection(True)
         self.ignore_table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.ignore_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         ignore_layout.addWidget(self.ignore_table)
 
-        self.populate_ignore_table()
-
         ignore_btn_layout = QtWidgets.QHBoxLayout()
         self.add_ignore_btn = QtWidgets.QPushButton("Add")
         self.edit_ignore_btn = QtWidgets.QPushButton("Edit")
@@ -840,65 +1474,107 @@ class InvoicesManagementTab(QtWidgets.QWidget):
         main_layout.addWidget(self.status_label)
 
         self.setLayout(main_layout)
+        self.layout().activate()
+        self.setUpdatesEnabled(True)
 
     def load_json(self, path):
-        if not os.path.exists(path):
-            return None
+        """Return parsed JSON from path, or None if it is missing or unreadable."""
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
+            mtime = os.stat(path).st_mtime_ns
+            cached = _JSON_CACHE.get(path)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            with open(path, 'rb') as f:
+                data = json_loads(f.read())
+            _JSON_CACHE[path] = (mtime, data)
+            return data
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            logging.exception(f"load_json failed for {path}")
             return None
     
-    def save_json(self, path, data):
+    def save_json(self, path, data, pretty=False):
+        """Atomically replace path with data, so a crash can't leave it half-written."""
+        tmp_path = path + '.tmp'
         try:
-            with open(path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4)
+            buf = json_dumps(data, pretty)
+            with open(tmp_path, 'wb') as f:
+                f.write(buf)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+            _JSON_CACHE[path] = (os.stat(path).st_mtime_ns, data)
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "Error", f"Failed to save {path}:\n{e}")
 
-    def populate_sender_table(self):
-        self.sender_table.setRowCount(len(self.invoices_config_data))
-        for row, item in enumerate(self.invoices_config_data):
-            email = item.get("sender_email", "")
-            folder_name = item.get("folder_name", "")
-            file_name = item.get("file_name", "")
-            month_offset = str(item.get("month_offset", 0))
-            day_offset = str(item.get("day_offset", 0))
-
-            self.sender_table.setItem(row, 0, QtWidgets.QTableWidgetItem(email))
-            self.sender_table.setItem(row, 1, QtWidgets.QTableWidgetItem(folder_name))
-            self.sender_table.setItem(row, 2, QtWidgets.QTableWidgetItem(file_name))
-            self.sender_table.setItem(row, 3, QtWidgets.QTableWidgetItem(month_offset))
-            self.sender_table.setItem(row, 4, QtWidgets.QTableWidgetItem(day_offset))
-
-    def populate_ignore_table(self):
-        self.ignore_table.setRowCount(len(self.ignore_files_data))
-        for row, pattern in enumerate(self.ignore_files_data):
-            self.ignore_table.setItem(row, 0, QtWidgets.QTableWidgetItem(pattern))
+    def _schedule_save(self, path, data, pretty=False):
+        """Queue data to be saved to path once edits settle down."""
+        self._pending_saves[path] = (data, pretty)
+        self._save_timer.start(250)
+
+    def _flush_pending(self):
+        """Write out every queued save now."""
+        self._save_timer.stop()
+        pending, self._pending_saves = self._pending_saves, {}
+        for path, (data, pretty) in pending.items():
+            self.save_json(path, data, pretty)
+
+    def _save_sender_config(self):
+        """Queue the sender rules to be written back as a list of dicts."""
+        rows = _restore_positions(
+            (rule.to_dict() for rule in self.invoices_config_data), self._malformed_sender_rows)
+        self._schedule_save(self.invoices_config_path, rows, pretty=True)
+
+    def _rebuild_sender_index(self):
+        """Map lower-cased sender email -> config entry."""
+        self._sender_index = {
+            rule.sender_email.strip().lower(): rule for rule in self.invoices_config_data
+        }
+
+    def lookup_sender(self, addr):
+        """Return the config entry for a sender email, or None."""
+        return self._sender_index.get(addr.strip().lower())
+
+    def _warn_duplicate_sender(self, addr):
+        QtWidgets.QMessageBox.warning(
+            self, "Duplicate Sender",
+            f"A configuration for {addr} already exists."
+        )
 
     def add_sender_config(self):
         dialog = SenderConfigDialog(self)
         if dialog.exec_() == QtWidgets.QDialog.Accepted:
             new_data = dialog.get_data()
-            self.invoices_config_data.append(new_data)
-            self.save_json(self.invoices_config_path, self.invoices_config_data)
-            self.populate_sender_table()
+            if self.lookup_sender(new_data.sender_email) is not None:
+                self._warn_duplicate_sender(new_data.sender_email)
+                return
+            self.sender_model.append_row(new_data)
+            self._save_sender_config()
+            self._rebuild_sender_index()
 
     def edit_sender_config(self):
-        row = self.sender_table.currentRow()
+        row = self.sender_table.currentIndex().row()
         if row < 0:
             return
         current_item = self.invoices_config_data[row]
         dialog = SenderConfigDialog(self, current_item)
         if dialog.exec_() == QtWidgets.QDialog.Accepted:
             updated_data = dialog.get_data()
-            self.invoices_config_data[row] = updated_data
-            self.save_json(self.invoices_config_path, self.invoices_config_data)
-            self.populate_sender_table()
+            key = updated_data.sender_email.strip().lower()
+            # Only refuse when the edit introduces a clash, so rows that
+            # already share an email in the file can still be edited
+            if key != current_item.sender_email.strip().lower() and any(
+                    i != row and rule.sender_email.strip().lower() == key
+                    for i, rule in enumerate(self.invoices_config_data)):
+                self._warn_duplicate_sender(updated_data.sender_email)
+                return
+            self.sender_model.update_row(row, updated_data)
+            self._save_sender_config()
+            self._rebuild_sender_index()
 
     def remove_sender_config(self):
-        row = self.sender_table.currentRow()
+        row = self.sender_table.currentIndex().row()
         if row < 0:
             return
         confirm = QtWidgets.QMessageBox.question(
@@ -907,30 +1583,39 @@ class InvoicesManagementTab(QtWidgets.QWidget):
             QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No
         )
         if confirm == QtWidgets.QMessageBox.Yes:
-            del self.invoices_config_data[row]
-            self.save_json(self.invoices_config_path, self.invoices_config_data)
-            self.populate_sender_table()
+            self.sender_model.remove_row(row)
+            self._save_sender_config()
+            self._rebuild_sender_index()
 
     def add_ignore_item(self):
         text, ok = QtWidgets.QInputDialog.getText(self, "Add Ignore Pattern", "Pattern:")
         if ok and text.strip():
-            self.ignore_files_data.append(text.strip())
-            self.save_json(self.invoices_ignore_path, self.ignore_files_data)
-            self.populate_ignore_table()
+            text = text.strip()
+            if self.contains_ignore(text):
+                return
+            self._ignore_set.add(text)
+            self.ignore_model.append_row(text)
+            self._rebuild_ignore_re()
+            self._save_ignore_list()
 
     def edit_ignore_item(self):
-        row = self.ignore_table.currentRow()
+        row = self.ignore_table.currentIndex().row()
         if row < 0:
             return
         current_value = self.ignore_files_data[row]
         text, ok = QtWidgets.QInputDialog.getText(self, "Edit Ignore Pattern", "Pattern:", text=current_value)
         if ok and text.strip():
-            self.ignore_files_data[row] = text.strip()
-            self.save_json(self.invoices_ignore_path, self.ignore_files_data)
-            self.populate_ignore_table()
+            text = text.strip()
+            if text != current_value and self.contains_ignore(text):
+                return
+            self._ignore_set.discard(current_value)
+            self._ignore_set.add(text)
+            self.ignore_model.update_row(row, text)
+            self._rebuild_ignore_re()
+            self._save_ignore_list()
 
     def remove_ignore_item(self):
-        row = self.ignore_table.currentRow()
+        row = self.ignore_table.currentIndex().row()
         if row < 0:
             return
         confirm = QtWidgets.QMessageBox.question(
@@ -939,35 +1624,59 @@ class InvoicesManagementTab(QtWidgets.QWidget):
             QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.No
         )
         if confirm == QtWidgets.QMessageBox.Yes:
-            del self.ignore_files_data[row]
-            self.save_json(self.invoices_ignore_path, self.ignore_files_data)
-            self.populate_ignore_table()
+            self._ignore_set.discard(self.ignore_files_data[row])
+            self.ignore_model.remove_row(row)
+            self._rebuild_ignore_re()
+            self._save_ignore_list()
+
+    def _save_ignore_list(self):
+        """Queue the ignore patterns, plus any malformed entries, to be written back."""
+        items = _restore_positions(self.ignore_files_data, self._malformed_ignore_items)
+        self._schedule_save(self.invoices_ignore_path, items, pretty=True)
+
+    def _rebuild_ignore_re(self):
+        """Compile all ignore globs into one case-insensitive regex (or None)."""
+        if not self.ignore_files_data:
+            self._ignore_re = None
+            return
+        self._ignore_re = re.compile(
+            '|'.join('(?:%s)' % fnmatch.translate(p) for p in self.ignore_files_data),
+            re.IGNORECASE
+        )
 
-    def process_invoices_action(self):
-        """Invoke process_files(), capturing print output."""
-        import io
-        import sys
+    def is_ignored(self, filename):
+        """Return True if filename matches any ignore pattern."""
+        return bool(self._ignore_re and self._ignore_re.match(filename))
 
-        from __main__ import process_files
+    def contains_ignore(self, pattern):
+        """Return True if pattern is already in the ignore list."""
+        return pattern in self._ignore_set
 
-        self.status_label.setText("Status: Processing...")
-        QtWidgets.QApplication.processEvents()
+    def process_invoices_action(self):
+        """Run process_files() in the background, streaming its report lines."""
+        # process_files reads the rules from disk, so write out pending edits first
+        self._flush_pending()
 
-        old_stdout = sys.stdout
-        redirected_output = io.StringIO()
-        sys.stdout = redirected_output
+        self.process_invoices_btn.setEnabled(False)
+        self.status_label.setText("Status: Processing...")
+        self._process_output = []
 
-        try:
-            process_files()
-        except Exception as e:
-            print(f"Error while processing files: {e}")
+        worker = _ProcessWorker(self._process_files, self.is_ignored)
+        worker.signals.message.connect(self._append_status_line)
+        worker.signals.finished.connect(self.on_process_finished)
+        QtCore.QThreadPool.globalInstance().start(worker)
 
-        sys.stdout = old_stdout
-        output_text = redirected_output.getvalue()
-        redirected_output.close()
+    def _append_status_line(self, line):
+        """Show a process_files() report line as it arrives (main thread)."""
+        self._process_output.append(line)
+        self.status_label.setText(f"Status: {line}")
 
+    def on_process_finished(self):
+        """Show the result of a background process_files() run (main thread)."""
+        self.process_invoices_btn.setEnabled(True)
         self.status_label.setText("Status: Idle")
 
+        output_text = "\n".join(self._process_output)
         if output_text.strip():
             QtWidgets.QMessageBox.information(self, "Process Invoices", output_text)
         else:
@@ -984,36 +1693,36 @@ class SenderConfigDialog(QtWidgets.QDialog):
         self.setWindowTitle("Sender Configuration")
         self.setFixedSize(300, 250)
 
-        self.data = data if data else {}
+        self.data = data if data else SenderRule()
 
         layout = QtWidgets.QVBoxLayout()
 
         # Sender Email
-        self.email_edit = QtWidgets.QLineEdit(self.data.get("sender_email", ""))
+        self.email_edit = QtWidgets.QLineEdit(self.data.sender_email)
         layout.addWidget(QtWidgets.QLabel("Sender Email:"))
         layout.addWidget(self.email_edit)
 
         # Folder Name
-        self.folder_edit = QtWidgets.QLineEdit(self.data.get("folder_name", ""))
+        self.folder_edit = QtWidgets.QLineEdit(self.data.folder_name)
         layout.addWidget(QtWidgets.QLabel("Folder Name:"))
         layout.addWidget(self.folder_edit)
 
         # File Name
-        self.file_edit = QtWidgets.QLineEdit(self.data.get("file_name", ""))
+        self.file_edit = QtWidgets.QLineEdit(self.data.file_name)
         layout.addWidget(QtWidgets.QLabel("File Name:"))
         layout.addWidget(self.file_edit)
 
         # Month Offset
         self.month_offset_edit = QtWidgets.QSpinBox()
         self.month_offset_edit.setRange(-12, 12)
-        self.month_offset_edit.setValue(int(self.data.get("month_offset", 0)))
+        self.month_offset_edit.setValue(self.data.month_offset)
         layout.addWidget(QtWidgets.QLabel("Month Offset:"))
         layout.addWidget(self.month_offset_edit)
 
         # Day Offset
         self.day_offset_edit = QtWidgets.QSpinBox()
         self.day_offset_edit.setRange(-31, 31)
-        self.day_offset_edit.setValue(int(self.data.get("day_offset", 0)))
+        self.day_offset_edit.setValue(self.data.day_offset)
         layout.addWidget(QtWidgets.QLabel("Day Offset:"))
         layout.addWidget(self.day_offset_edit)
 
@@ -1030,13 +1739,14 @@ class SenderConfigDialog(QtWidgets.QDialog):
         self.setLayout(layout)
 
     def get_data(self):
-        return {
-            "sender_email": self.email_edit.text().strip(),
-            "folder_name": self.folder_edit.text().strip(),
-            "file_name": self.file_edit.text().strip(),
-            "month_offset": self.month_offset_edit.value(),
-            "day_offset": self.day_offset_edit.value(),
-        }
+        return SenderRule(
+            sender_email=self.email_edit.text().strip(),
+            folder_name=self.folder_edit.text().strip(),
+            file_name=self.file_edit.text().strip(),
+            month_offset=self.month_offset_edit.value(),
+            day_offset=self.day_offset_edit.value(),
+            extra=dict(self.data.extra),
+        )
 
 ################################################################################
 #                                    MAIN                                      #
@@ -1053,7 +1763,7 @@ def main():
         app.setQuitOnLastWindowClosed(False)
         
         # Icon
-        icon_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'icon.png')
+        icon_path = os.path.join(_HERE, 'assets', 'icon.png')
         if not os.path.exists(icon_path):
             icon = QtGui.QIcon.fromTheme("mail-message-new")
             logging.warning("Custom icon not found; using default.")